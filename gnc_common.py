@@ -5,16 +5,54 @@ Shared module for all GNUCash Python scripts.
 """
 
 import sys
+from functools import cache
 from pathlib import Path
 from typing import Optional
 
-try:
-    import gnucash
-    from gnucash import gnucash_core_c
-except ImportError:
-    print("Error: GNUCash Python bindings not found.")
-    print("Make sure to run scripts with: ./gpython3 <script>")
-    sys.exit(1)
+# The GNUCash bindings load large native libraries, so they are imported on
+# first use rather than at import time.
+_gnucash = None
+_ACCT_TYPE_NAMES = None
+
+
+def load_gnucash():
+    """Import the GNUCash bindings on first use and return the module."""
+    global _gnucash
+    if _gnucash is None:
+        try:
+            import gnucash
+            from gnucash import gnucash_core_c  # also binds gnucash.gnucash_core_c
+        except ImportError:
+            print("Error: GNUCash Python bindings not found.")
+            print("Make sure to run scripts with: ./gpython3 <script>")
+            sys.exit(1)
+        _gnucash = gnucash
+    return _gnucash
+
+
+def _account_type_names():
+    """Readable names for the account type enum, built on first use."""
+    global _ACCT_TYPE_NAMES
+    if _ACCT_TYPE_NAMES is None:
+        gnucash = load_gnucash()
+        _ACCT_TYPE_NAMES = {
+            gnucash.ACCT_TYPE_ASSET: "Asset",
+            gnucash.ACCT_TYPE_LIABILITY: "Liability",
+            gnucash.ACCT_TYPE_EQUITY: "Equity",
+            gnucash.ACCT_TYPE_INCOME: "Income",
+            gnucash.ACCT_TYPE_EXPENSE: "Expense",
+            gnucash.ACCT_TYPE_BANK: "Bank",
+            gnucash.ACCT_TYPE_CASH: "Cash",
+            gnucash.ACCT_TYPE_CREDIT: "Credit",
+            gnucash.ACCT_TYPE_STOCK: "Stock",
+            gnucash.ACCT_TYPE_MUTUAL: "Mutual Fund",
+            gnucash.ACCT_TYPE_CHECKING: "Checking",
+            gnucash.ACCT_TYPE_RECEIVABLE: "Accounts Receivable",
+            gnucash.ACCT_TYPE_PAYABLE: "Accounts Payable",
+            gnucash.ACCT_TYPE_ROOT: "Root",
+            gnucash.ACCT_TYPE_TRADING: "Trading",
+        }
+    return _ACCT_TYPE_NAMES
 
 
 class GnuCashSession:
@@ -37,11 +75,12 @@ class GnuCashSession:
     
     def __enter__(self):
         """Enter the session context - opens the book and initializes logging."""
+        gnucash = load_gnucash()
         try:
             # Initialize logging first if config provided
             if self.log_conf:
-                gnucash_core_c.qof_log_init()
-                gnucash_core_c.qof_log_parse_log_config(self.log_conf)
+                gnucash.gnucash_core_c.qof_log_init()
+                gnucash.gnucash_core_c.qof_log_parse_log_config(self.log_conf)
                 print(f"GNUCash logging initialized from: {self.log_conf}")
             
             # Open session in appropriate mode
@@ -76,35 +115,34 @@ class GnuCashSession:
                 print(f"Warning: Error closing GNUCash session: {e}")
 
 
+@cache
 def get_account_type_name(account_type):
     """Convert account type enum to readable name (compatible with all GNUCash versions)."""
-    type_names = {
-        gnucash.ACCT_TYPE_ASSET: "Asset",
-        gnucash.ACCT_TYPE_LIABILITY: "Liability", 
-        gnucash.ACCT_TYPE_EQUITY: "Equity",
-        gnucash.ACCT_TYPE_INCOME: "Income",
-        gnucash.ACCT_TYPE_EXPENSE: "Expense",
-        gnucash.ACCT_TYPE_BANK: "Bank",
-        gnucash.ACCT_TYPE_CASH: "Cash",
-        gnucash.ACCT_TYPE_CREDIT: "Credit",
-        gnucash.ACCT_TYPE_STOCK: "Stock",
-        gnucash.ACCT_TYPE_MUTUAL: "Mutual Fund",
-        gnucash.ACCT_TYPE_CHECKING: "Checking",
-        gnucash.ACCT_TYPE_RECEIVABLE: "Accounts Receivable",
-        gnucash.ACCT_TYPE_PAYABLE: "Accounts Payable",
-        gnucash.ACCT_TYPE_ROOT: "Root",
-        gnucash.ACCT_TYPE_TRADING: "Trading",
-    }
-    return type_names.get(account_type, f"Unknown({account_type})")
-
-
-def find_account_by_path(book, account_path: str):
+    return _account_type_names().get(account_type, f"Unknown({account_type})")
+
+
+def _children_by_name(account, path_key, child_index):
+    """Return {child name: child account} for account, cached under path_key."""
+    children = child_index.get(path_key)
+    if children is None:
+        children = {}
+        for child in account.get_children():
+            children.setdefault(child.GetName(), child)  # first child with a name wins
+        child_index[path_key] = children
+    return children
+
+
+def find_account_by_path(book, account_path: str, child_index: Optional[dict] = None):
     """
     Find account by its hierarchical path (e.g., 'Liabilities: Credit Cards: Chase').
     
     Args:
         book: GNUCash book object
         account_path: Colon-separated account path
+        child_index: Dict to cache child-name lookups in (optional). Pass the
+            same dict to repeated calls on one book so each parent's children
+            are listed only once; keyed by parent path, since SWIG hands out
+            new wrapper objects on every call.
         
     Returns:
         Account object if found, None otherwise
@@ -112,43 +150,56 @@ def find_account_by_path(book, account_path: str):
     root_account = book.get_root_account()
     path_parts = [part.strip() for part in account_path.split(':')]
     
-    def find_account_recursive(account, remaining_path):
-        if not remaining_path:
-            return account
-        
-        target_name = remaining_path[0]
-        for child in account.get_children():
-            if child.GetName() == target_name:
-                return find_account_recursive(child, remaining_path[1:])
-        return None
-    
     # Skip "Root Account" if it's the first part
     if path_parts and path_parts[0] == "Root Account":
         path_parts = path_parts[1:]
     
-    return find_account_recursive(root_account, path_parts)
+    # Walk down one level per path component (first child with the name wins)
+    account = root_account
+    for depth, target_name in enumerate(path_parts):
+        if child_index is None:
+            account = next((child for child in account.get_children()
+                            if child.GetName() == target_name), None)
+        else:
+            children = _children_by_name(account, tuple(path_parts[:depth]), child_index)
+            account = children.get(target_name)
+        if account is None:
+            return None
+    return account
 
 
-def get_credit_card_accounts(book, specified_accounts=None):
+def get_credit_card_accounts(book, specified_accounts=None, prune_incompatible: bool = True,
+                             child_index: Optional[dict] = None):
     """
     Get credit card accounts from the book.
     
     Args:
         book: GNUCash book object
         specified_accounts: List of account paths to filter by (optional)
+        prune_incompatible: When searching the whole book, skip Income,
+            Expense, Equity and Trading subtrees (default: True). GNUCash
+            does not allow a credit account under those types; pass False
+            to walk everything, e.g. for books edited outside GNUCash.
+        child_index: Child-name cache passed on to find_account_by_path()
+            for specified accounts (optional; a fresh one per call otherwise)
         
     Returns:
         List of credit card account objects
     """
+    gnucash = load_gnucash()
+    acct_type_credit = gnucash.ACCT_TYPE_CREDIT
+    
     if specified_accounts:
         # Use specified accounts from config
         cc_accounts = []
+        if child_index is None:
+            child_index = {}  # shared so common parents are listed only once
         print(f"Using {len(specified_accounts)} accounts from configuration:")
         
         for account_path in specified_accounts:
-            account = find_account_by_path(book, account_path)
+            account = find_account_by_path(book, account_path, child_index)
             if account:
-                if account.GetType() == gnucash.ACCT_TYPE_CREDIT:
+                if account.GetType() == acct_type_credit:
                     cc_accounts.append(account)
                     print(f"  ✓ Found: {account_path}")
                 else:
@@ -160,15 +211,27 @@ def get_credit_card_accounts(book, specified_accounts=None):
     else:
         # Default behavior: find all credit card accounts
         cc_accounts = []
-        root_account = book.get_root_account()
         
-        def find_cc_accounts(account):
-            if account.GetType() == gnucash.ACCT_TYPE_CREDIT:
+        # Subtrees that cannot contain a credit account (typically most of
+        # the book, since Expenses is usually the largest tree)
+        if prune_incompatible:
+            pruned_types = frozenset((gnucash.ACCT_TYPE_INCOME, gnucash.ACCT_TYPE_EXPENSE,
+                                      gnucash.ACCT_TYPE_EQUITY, gnucash.ACCT_TYPE_TRADING))
+        else:
+            pruned_types = frozenset()
+        
+        # Depth-first walk with an explicit stack; children are pushed in
+        # reverse so accounts come out in the same order as a recursive walk
+        stack = [book.get_root_account()]
+        while stack:
+            account = stack.pop()
+            account_type = account.GetType()
+            if account_type == acct_type_credit:
                 cc_accounts.append(account)
-            for child in account.get_children():
-                find_cc_accounts(child)
+            elif account_type in pruned_types:
+                continue
+            stack.extend(reversed(account.get_children()))
         
-        find_cc_accounts(root_account)
         return cc_accounts
 
 
@@ -4,62 +4,19 @@ GNUCash Account Lister
 Lists all accounts in a GNUCash book in hierarchical format for easy copy-paste into config files.
 """
 
-from typing import Optional
 import sys
+from dataclasses import dataclass
 from pathlib import Path
 
-try:
-    import gnucash
-    from gnucash import gnucash_core_c
-except ImportError:
-    print("Error: GNUCash Python bindings not found.")
-    print("Make sure to run this script with: ./gpython3 list_accounts.py")
-    sys.exit(1)
+from gnc_common import GnuCashSession, get_account_type_name, load_gnucash
 
-class GnuCashSession:
-    """Context manager for GNUCash sessions to ensure proper cleanup."""
-    
-    def __init__(self, book_path, log_conf: Optional[str]=None):
-        """
 
-        Args:
-            book_path: Path of the GNUCash book to load.
-            log_conf: Path of the logging configuration file.
-        """
-        self.book_path = book_path
-        self.session = None
-        self.book = None
-        self.log_conf = log_conf
-    
-    def __enter__(self):
-        try:
-            self.session = gnucash.Session( 
-                            self.book_path,
-                            mode=gnucash.SessionOpenMode.SESSION_READ_ONLY
-            )
-            if self.log_conf:
-                gnucash_core_c.qof_log_init()
-                gnucash_core_c.qof_log_parse_log_config(self.log_conf)
-            self.book = self.session.book
-            print(f"Successfully loaded GNUCash book: {self.book_path}")
-            return self.book
-        except Exception as e:
-            print(f"Error loading GNUCash book: {e}")
-            if self.session:
-                try:
-                    self.session.end()
-                except:
-                    pass
-            raise
-    
-    def __exit__(self, exc_type, exc_val, exc_tb):
-        if self.session:
-            try:
-                self.session.end()
-                self.session.destroy()
-                print("GNUCash session closed and destroyed successfully")
-            except Exception as e:
-                print(f"Warning: Error closing GNUCash session: {e}")
+@dataclass(slots=True, frozen=True)
+class AcctRow:
+    """One listed account: display path, type name and GNUCash full name."""
+    path: str
+    type: str
+    full_name: str
 
 
 class AccountLister:
@@ -69,36 +26,34 @@ class AccountLister:
         self.book_path = book_path
         self.book = None
         
-    def get_account_type_name(self, account_type):
-        """Convert account type enum to readable name."""
-        type_names = {
-            gnucash.ACCT_TYPE_ASSET: "Asset",
-            gnucash.ACCT_TYPE_LIABILITY: "Liability", 
-            gnucash.ACCT_TYPE_EQUITY: "Equity",
-            gnucash.ACCT_TYPE_INCOME: "Income",
-            gnucash.ACCT_TYPE_EXPENSE: "Expense",
-            gnucash.ACCT_TYPE_BANK: "Bank",
-            gnucash.ACCT_TYPE_CASH: "Cash",
-            gnucash.ACCT_TYPE_CREDIT: "Credit",
-            gnucash.ACCT_TYPE_STOCK: "Stock",
-            gnucash.ACCT_TYPE_MUTUAL: "Mutual Fund",
-            gnucash.ACCT_TYPE_CHECKING: "Checking",
-            gnucash.ACCT_TYPE_RECEIVABLE: "Accounts Receivable",
-            gnucash.ACCT_TYPE_PAYABLE: "Accounts Payable",
-            gnucash.ACCT_TYPE_ROOT: "Root",
-            gnucash.ACCT_TYPE_TRADING: "Trading",
-        }
-        return type_names.get(account_type, f"Unknown({account_type})")
-    
     def list_all_accounts(self, show_types=True, credit_cards_only=False):
         """List all accounts in hierarchical format."""
         root_account = self.book.get_root_account()
         accounts = []
         
-        def collect_accounts(account, path=""):
+        # Full names are built on the way down, the same way
+        # get_full_name() joins them (root excluded, book separator), instead
+        # of having GnuCash walk back up the parents for every account.
+        gnucash = load_gnucash()
+        separator = gnucash.gnucash_core_c.gnc_get_account_separator_string()
+        
+        # Walk the tree with an explicit stack (pre-order, children in
+        # book order) rather than recursing once per account. Each entry
+        # carries the parent's display path and the full-name prefix for
+        # the account (None for the root, whose full name is empty).
+        stack = [(root_account, "", None)]
+        while stack:
+            account, path, full_name_prefix = stack.pop()
             account_name = account.GetName()
             account_type = account.GetType()
             
+            if full_name_prefix is None:
+                full_name = ""
+                child_prefix = ""
+            else:
+                full_name = full_name_prefix + account_name
+                child_prefix = full_name + separator
+            
             # Skip the root account itself
             if account_name == "Root Account":
                 current_path = ""
@@ -107,25 +62,15 @@ class AccountLister:
             
             # Only add non-root accounts
             if current_path:
-                if credit_cards_only:
-                    if account_type == gnucash.ACCT_TYPE_CREDIT:
-                        accounts.append({
-                            'path': current_path,
-                            'type': self.get_account_type_name(account_type),
-                            'full_name': account.get_full_name()
-                        })
-                else:
-                    accounts.append({
-                        'path': current_path,
-                        'type': self.get_account_type_name(account_type),
-                        'full_name': account.get_full_name()
-                    })
+                if not credit_cards_only or account_type == gnucash.ACCT_TYPE_CREDIT:
+                    accounts.append(AcctRow(current_path,
+                                            get_account_type_name(account_type),
+                                            full_name))
             
-            # Recursively process children
-            for child in account.get_children():
-                collect_accounts(child, current_path)
+            # Push children reversed so they are visited in order
+            stack.extend((child, current_path, child_prefix)
+                         for child in reversed(account.get_children()))
         
-        collect_accounts(root_account)
         return accounts
     
     def print_accounts(self, show_types=True, credit_cards_only=False):
@@ -145,25 +90,27 @@ class AccountLister:
         print("Copy the account paths below for your YAML configuration:")
         print()
         
-        for account in accounts:
-            if show_types:
-                print(f"  - \"{account['path']}\"  # {account['type']}")
-            else:
-                print(f"  - \"{account['path']}\"")
+        # Build the listing and print it in one call rather than one
+        # print() per account
+        if show_types:
+            lines = [f"  - \"{account.path}\"  # {account.type}" for account in accounts]
+        else:
+            lines = [f"  - \"{account.path}\"" for account in accounts]
+        if lines:
+            print("\n".join(lines))
         
         print(f"\nTotal accounts listed: {len(accounts)}")
         
         if not credit_cards_only:
             # Show credit cards separately for convenience
-            credit_cards = [acc for acc in accounts if "Credit" in acc['type']]
+            credit_cards = [acc for acc in accounts if "Credit" in acc.type]
             if credit_cards:
                 print(f"\n{'='*60}")
                 print("CREDIT CARD ACCOUNTS FOR EASY COPY-PASTE")
                 print(f"{'='*60}")
                 print("# Add these to your analyze_config.yaml file:")
                 print("credit_card_accounts:")
-                for cc in credit_cards:
-                    print(f"  - \"{cc['path']}\"")
+                print("\n".join(f"  - \"{cc.path}\"" for cc in credit_cards))
     
     def generate_sample_config(self):
         """Generate a sample YAML configuration file."""
@@ -180,7 +127,7 @@ credit_card_accounts:
         if accounts:
             config_content += "  # Uncomment and modify the accounts you want to analyze:\n"
             for account in accounts:
-                config_content += f"  # - \"{account['path']}\"\n"
+                config_content += f"  # - \"{account.path}\"\n"
         else:
             config_content += """  # Example format:
   # - "Liabilities: Credit Cards: Chase Freedom"
@@ -199,6 +146,7 @@ rule_settings:
   minimum_transactions: 2      # Minimum transactions needed to create a rule
   confidence_threshold: 0.3    # Minimum confidence score for rules
   fuzzy_similarity: 0.8       # Similarity threshold for fuzzy merchant matching
+  workers: 1                   # Worker processes for rule generation (1 = serial)
 """
         
         return config_content
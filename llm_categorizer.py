@@ -8,22 +8,331 @@ import sys
 import json
 import argparse
 import os
+import time
+import sqlite3
+import threading
 from typing import Dict, List, Optional, TypedDict, Annotated
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from difflib import get_close_matches
+from functools import cached_property
 from pathlib import Path
 import re
-import pdb
 
 from langgraph.graph import StateGraph, END
 from langgraph.prebuilt import ToolNode
-from langchain_core.messages import HumanMessage, AIMessage, ToolMessage
+from langchain_core.messages import HumanMessage, AIMessage, ToolMessage, SystemMessage
 from langchain_core.tools import tool
 from langchain_openai import ChatOpenAI
 from langchain_tavily import TavilySearch
 
+import httpx
+from pydantic import BaseModel
+
 from rich.table import Table
 from rich.console import Console
 
+# Optional: orjson parses the LLM answers and writes results several times
+# faster than json.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _json_loads(data):
+    """json.loads, via orjson when it is installed"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _json_dumps(obj) -> str:
+    """Compact json.dumps, via orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(obj).decode("utf-8")
+    return json.dumps(obj)
+
+
+# Markdown code fences and trailing commas, the usual ways an otherwise
+# valid JSON answer fails to parse
+_RE_JSON_FENCE = re.compile(r"^\s*```(?:json)?\s*|\s*```\s*$", re.IGNORECASE)
+_RE_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+
+
+def _parse_llm_json(content: str):
+    """Parse a JSON answer, retrying without code fences and then without
+    trailing commas; raises json.JSONDecodeError if it still does not parse"""
+    try:
+        return _json_loads(content)
+    except json.JSONDecodeError:
+        pass
+    unfenced = _RE_JSON_FENCE.sub("", content)
+    try:
+        return _json_loads(unfenced)
+    except json.JSONDecodeError:
+        # Last resort, as it would also touch ", }" inside a string value
+        return _json_loads(_RE_TRAILING_COMMA.sub(r"\1", unfenced))
+
+
+def _write_json(filename: str, data) -> None:
+    """Write data to filename as indented JSON"""
+    if orjson is not None:
+        with open(filename, 'wb') as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+    else:
+        with open(filename, 'w') as f:
+            json.dump(data, f, indent=2)
+
+
+# Merchants the prompt guidelines already pin to a category. Descriptions
+# that start with one are categorized locally without a search or LLM call.
+# The pattern tries longer keywords first so "COSTCO GAS" wins over "COSTCO",
+# and spaces or asterisks may separate a keyword's words ("UBER *EATS 800..."
+# and "UBER* EATS" are Uber Eats, not Uber). Only a leading keyword counts:
+# a keyword later on often names something else ("DD *DOORDASH TARGET" is a
+# DoorDash order, not a Target purchase), so those go to the LLM.
+_KEYWORD_CATEGORIES = {
+    "NETFLIX": ("Netflix", "Expenses:Bills:Streaming Services"),
+    "SPOTIFY": ("Spotify", "Expenses:Bills:Streaming Services"),
+    "ITUNES": ("iTunes", "Expenses:Bills:Streaming Services"),
+    "STARBUCKS": ("Starbucks", "Expenses:Dining Out"),
+    "CHIPOTLE": ("Chipotle", "Expenses:Dining Out"),
+    "UBER EATS": ("Uber Eats", "Expenses:Dining Out"),
+    "UBEREATS": ("Uber Eats", "Expenses:Dining Out"),
+    "UBER": ("Uber", "Expenses:Transportation:Rideshare"),
+    "LYFT": ("Lyft", "Expenses:Transportation:Rideshare"),
+    "LINKEDIN": ("LinkedIn", "Expenses:Household:Software"),
+    "TARGET": ("Target", "Expenses:Household:Merchandise"),
+    "WALMART": ("Walmart", "Expenses:Household:Merchandise"),
+    "WAL-MART": ("Walmart", "Expenses:Household:Merchandise"),
+    "COSTCO GAS": ("Costco Gas", "Expenses:Automobile:Gasoline"),
+    "COSTCO": ("Costco", "Expenses:Groceries"),
+    "VONS": ("Vons", "Expenses:Groceries"),
+    "RALPHS": ("Ralphs", "Expenses:Groceries"),
+    "AMAZON FRESH": ("Amazon Fresh", "Expenses:Groceries"),
+    "T-MOBILE": ("T-Mobile", "Expenses:Bills:Cellular"),
+}
+_KEYWORD_RE = re.compile(
+    r"[\s*]*(?:" + "|".join(re.escape(k).replace(r"\ ", r"[\s*]+")
+                            for k in sorted(_KEYWORD_CATEGORIES, key=len, reverse=True)) + r")\b",
+    re.IGNORECASE)
+_KEYWORD_CONFIDENCE = 0.85
+
+# Card bill payments ("INTERNET PAYMENT THANK YOU" and variants) are not
+# expenses; the prompt has always mapped them to "Unspecified"
+_RE_CARD_PAYMENT = re.compile(r"\bPAYMENT\b.*\bTHANK\s*YOU\b", re.IGNORECASE)
+
+# Reference numbers, store numbers, long digit runs and asterisks vary
+# between charges from the same merchant ("STARBUCKS #12345" / "STARBUCKS #678")
+_RE_CACHE_NOISE = re.compile(r"#\s*\S*|\b\d{3,}\b|\*")
+# Only reasonably confident answers are reused for other transactions
+_CACHE_MIN_CONFIDENCE = 0.7
+
+# An off-list category whose last component is at least this similar to a
+# listed sibling's is taken as a misspelling of it ("Expenses:Grocery" ->
+# "Expenses:Groceries"); genuinely new suggestions score lower and are kept
+_CATEGORY_SNAP_CUTOFF = 0.75
+
+# Confident results are also kept on disk so later runs skip merchants
+# already categorized; bump the version whenever the stored record changes
+CACHE_DIR = Path(os.environ.get('XDG_CACHE_HOME', Path.home() / '.cache')) / 'gncutils'
+_CACHE_VERSION = 2
+_CACHE_MAX_AGE = 30 * 24 * 3600  # seconds
+# Cache writes are committed in batches rather than one transaction (and
+# fsync) per result; a crash loses at most this many results
+_CACHE_COMMIT_EVERY = 50
+
+
+# Actual GNUCash categories from user's file (shared by every instance;
+# a tuple so it cannot be changed behind the membership set built from it)
+_COMMON_CATEGORIES = (
+    "Expenses:Automobile",
+    "Expenses:Automobile:Maintenance",
+    "Expenses:Automobile:Rental",
+    "Expenses:Automobile:Parking",
+    "Expenses:Automobile:Gasoline",
+    "Expenses:Automobile:Car Payment",
+    "Expenses:Automobile:Taxes",
+    "Expenses:Automobile:Upgrades",
+    "Expenses:Automobile:Accessories",
+    "Expenses:Bank Charges",
+    "Expenses:Bank Charges:Interest Paid",
+    "Expenses:Bank Charges:Fees",
+    "Expenses:Bank Charges:Service Charge",
+    "Expenses:Bills",
+    "Expenses:Bills:Rent",
+    "Expenses:Bills:Telephone",
+    "Expenses:Bills:Cable-Satellite Television",
+    "Expenses:Bills:Health Club",
+    "Expenses:Bills:Electricity",
+    "Expenses:Bills:Cellular",
+    "Expenses:Bills:Water & Sewer",
+    "Expenses:Bills:Other Loan Payment",
+    "Expenses:Bills:Membership Fees",
+    "Expenses:Bills:Common Fund",
+    "Expenses:Bills:Online-Internet Service",
+    "Expenses:Bills:Natural Gas-Oil",
+    "Expenses:Bills:Homeowner's Dues",
+    "Expenses:Bills:Commute",
+    "Expenses:Bills:Garbage & Recycle",
+    "Expenses:Bills:Home Security",
+    "Expenses:Bills:Yard Maintenance",
+    "Expenses:Bills:Streaming Services",
+    "Expenses:Charitable Donations",
+    "Expenses:Charitable Donations:Political Donations",
+    "Expenses:Childcare",
+    "Expenses:Cash Withdrawal",
+    "Expenses:Cash Withdrawal:Miscellaneous Expenses",
+    "Expenses:Cash Withdrawal:Cash Expeditures",
+    "Expenses:Clothing",
+    "Expenses:Clothing:Casual",
+    "Expenses:Clothing:Formal",
+    "Expenses:Clothing:Makeup",
+    "Expenses:Clothing:Jewellery",
+    "Expenses:Dining Out",
+    "Expenses:Education",
+    "Expenses:Education:Miscellaneous",
+    "Expenses:Education:Fees",
+    "Expenses:Education:Books",
+    "Expenses:Education:Tuition",
+    "Expenses:Education:Kids Classes",
+    "Expenses:Electronics",
+    "Expenses:Electronics:Gadgets",
+    "Expenses:Electronics:Games",
+    "Expenses:Electronics:Accesories",
+    "Expenses:Electronics:Computers",
+    "Expenses:Gifts",
+    "Expenses:Gifts:General",
+    "Expenses:Gifts:To India",
+    "Expenses:Groceries",
+    "Expenses:Groceries:Membership",
+    "Expenses:Healthcare",
+    "Expenses:Healthcare:Counter",
+    "Expenses:Healthcare:Hospital",
+    "Expenses:Healthcare:Physician",
+    "Expenses:Healthcare:Athletic Club",
+    "Expenses:Healthcare:Prescriptions",
+    "Expenses:Healthcare:Home Gym",
+    "Expenses:Healthcare:Eyecare (Before-Tax)",
+    "Expenses:Healthcare:Dental",
+    "Expenses:Healthcare:Eyecare",
+    "Expenses:Healthcare:Miscellaneous",
+    "Expenses:Household",
+    "Expenses:Household:Baby Stuff",
+    "Expenses:Household:Software",
+    "Expenses:Household:Merchandise (Chicago)",
+    "Expenses:Household:Merchandise",
+    "Expenses:Household:House Cleaning",
+    "Expenses:Insurance",
+    "Expenses:Insurance:Life",
+    "Expenses:Insurance:Umbrella",
+    "Expenses:Insurance:Health (Before-Tax)",
+    "Expenses:Insurance:Homeowner's-Renter's",
+    "Expenses:Insurance:Health",
+    "Expenses:Insurance:Automobile",
+    "Expenses:Insurance:Renters",
+    "Expenses:Insurance:Legal",
+    "Expenses:Job Expense",
+    "Expenses:Job Expense:Non-Reimbursed",
+    "Expenses:Job Expense:Reimbursed",
+    "Expenses:Leisure",
+    "Expenses:Leisure:Musical Instruments",
+    "Expenses:Leisure:Toys & Games",
+    "Expenses:Leisure:Sporting Events",
+    "Expenses:Leisure:Entertaining",
+    "Expenses:Leisure:Tapes & CDs",
+    "Expenses:Leisure:Books & Magazines",
+    "Expenses:Leisure:Cultural Events",
+    "Expenses:Leisure:Movies & Video Rentals",
+    "Expenses:Leisure:Music Subscriptions",
+    "Expenses:Leisure:Sporting Goods",
+    "Expenses:Leisure:Phone Apps",
+    "Expenses:Leisure:Music and Dance Classes",
+    "Expenses:Leisure:Concerts",
+    "Expenses:Leisure:Family Events-Parties",
+    "Expenses:Leisure:Activities",
+    "Expenses:Miscellaneous",
+    "Expenses:Miscellaneous:Adjustment",
+    "Expenses:Miscellaneous:Guest Expenses",
+    "Expenses:Miscellaneous:Unclaimed",
+    "Expenses:Miscellaneous:Depreciation",
+    "Expenses:Miscellaneous:Fines",
+    "Expenses:Miscellaneous:Unknown",
+    "Expenses:Miscellaneous:Stationery",
+    "Expenses:Miscellaneous:Tax Preparation",
+    "Expenses:Miscellaneous:Finance Software",
+    "Expenses:Miscellaneous:Family Events",
+    "Expenses:Miscellaneous:Home-Transaction-Charges",
+    "Expenses:Personal Care",
+    "Expenses:Tax",
+    "Expenses:Tax:Fed",
+    "Expenses:Tax:Medicare",
+    "Expenses:Tax:Property",
+    "Expenses:Tax:SDI",
+    "Expenses:Tax:State",
+    "Expenses:Tax:Soc Sec",
+    "Expenses:Tax:Fed-Previous Year",
+    "Expenses:Tax:State-Previous Year",
+    "Expenses:Taxes",
+    "Expenses:Taxes:State-Provincial",
+    "Expenses:Taxes:Medicare Tax",
+    "Expenses:Taxes:Other Taxes",
+    "Expenses:Taxes:Federal Income Tax",
+    "Expenses:Taxes:Sales Tax",
+    "Expenses:Taxes:Income Tax-Previous Year",
+    "Expenses:Taxes:Social Security Tax",
+    "Expenses:Taxes:State Income Tax",
+    "Expenses:Taxes:Local Income Tax",
+    "Expenses:Transportation",
+    "Expenses:Transportation:Rideshare",
+    "Expenses:Transportation:Airfare",
+    "Expenses:Vacation",
+    "Expenses:Vacation:Travel",
+    "Expenses:Vacation:Purchases",
+    "Expenses:Vacation:Lodging",
+    "Expenses:Vacation:Activities",
+    "Expenses:Vacation:Dining",
+    "Expenses:Loan Payment",
+    "Expenses:Loan Payment:Interest",
+    "Expenses:Official",
+    "Expenses:Official:Immigration",
+    "Expenses:Official:Tax Preparation",
+    "Expenses:Depreciation",
+    "Expenses:Home Related",
+    "Expenses:Home Related:Fees-Commisions",
+    "Expenses:Home Related:Furnishings",
+    "Expenses:Home Related:Moving Expenses",
+    "Expenses:Home Related:Maintenance",
+    "Expenses:Home Related:Remodel-Upgrades",
+)
+
+
+def _normalize_description(description: str) -> str:
+    """Cache key for a description: upper case, without per-charge noise"""
+    cleaned = _RE_CACHE_NOISE.sub(" ", description.upper())
+    return " ".join(token for token in cleaned.split() if any(c.isalnum() for c in token))
+
+
+class Categorization(BaseModel):
+    """Structured answer requested from the LLM for one transaction"""
+    category: str
+    merchant: str
+    description: str
+    confidence: float
+    reasoning: str
+
+
+class GroupCategorization(Categorization):
+    """One transaction's answer within a grouped request"""
+    id: int
+
+
+class GroupCategorizations(BaseModel):
+    """Structured answer for a grouped request"""
+    results: List[GroupCategorization]
+
+
 class AgentState(TypedDict):
     """State for the categorization agent"""
     transaction_description: str
@@ -33,13 +342,16 @@ class AgentState(TypedDict):
     category: str
     confidence: float
     explanation: str
+    model: Optional[str]  # model that produced the answer (None if answered locally)
     messages: Annotated[List, "Messages in the conversation"]
 
 
 class LLMTransactionCategorizer:
     """LLM-based transaction categorizer with internet search capability"""
     
-    def __init__(self, openai_api_key: str = None, tavily_api_key: str = None):
+    def __init__(self, openai_api_key: str = None, tavily_api_key: str = None,
+                 model: str = "gpt-4o-mini", escalation_model: Optional[str] = None,
+                 escalation_threshold: float = 0.6, cache_file: Optional[Path] = None):
         # Initialize API keys
         self.openai_api_key = openai_api_key or os.getenv("OPENAI_API_KEY")
         self.tavily_api_key = tavily_api_key or os.getenv("TAVILY_API_KEY")
@@ -50,12 +362,35 @@ class LLMTransactionCategorizer:
         if not self.tavily_api_key:
             raise ValueError("Tavily API key required. Set TAVILY_API_KEY environment variable or pass as parameter.")
         
+        # One pooled HTTP client for all OpenAI traffic (chat calls from the
+        # worker threads and the Batch API calls), so connections are kept
+        # alive and reused instead of paying a TLS handshake per request
+        self._http_client = httpx.Client(
+            limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+            timeout=60.0
+        )
+        
         # Initialize LLM and tools
+        self.model = model
         self.llm = ChatOpenAI(
                 api_key=self.openai_api_key,  # pyright: ignore[reportArgumentType]
-                model="gpt-4o-mini",  # Cost-effective model
-                temperature=0.1  # Low temperature for consistent categorization
+                model=model,  # Cost-effective model by default
+                temperature=0.1,  # Low temperature for consistent categorization
+                http_client=self._http_client
         )
+        
+        # Optional stronger model, asked again only when the first answer's
+        # confidence is below escalation_threshold
+        self.escalation_model = escalation_model
+        self.escalation_threshold = escalation_threshold
+        self.escalation_llm = None
+        if escalation_model:
+            self.escalation_llm = ChatOpenAI(
+                    api_key=self.openai_api_key,  # pyright: ignore[reportArgumentType]
+                    model=escalation_model,
+                    temperature=0.1,
+                    http_client=self._http_client
+            )
 
         # Initialize
         self.search_tool = TavilySearch(
@@ -64,216 +399,161 @@ class LLMTransactionCategorizer:
             search_depth="basic"
         )
         
-        # Create the agent graph
-        self.agent = self._create_agent()
-        
         # Actual GNUCash categories from user's file
-        self.common_categories = [
-            "Expenses:Automobile",
-            "Expenses:Automobile:Maintenance",
-            "Expenses:Automobile:Rental",
-            "Expenses:Automobile:Parking",
-            "Expenses:Automobile:Gasoline",
-            "Expenses:Automobile:Car Payment",
-            "Expenses:Automobile:Taxes",
-            "Expenses:Automobile:Upgrades",
-            "Expenses:Automobile:Accessories",
-            "Expenses:Bank Charges",
-            "Expenses:Bank Charges:Interest Paid",
-            "Expenses:Bank Charges:Fees",
-            "Expenses:Bank Charges:Service Charge",
-            "Expenses:Bills",
-            "Expenses:Bills:Rent",
-            "Expenses:Bills:Telephone",
-            "Expenses:Bills:Cable-Satellite Television",
-            "Expenses:Bills:Health Club",
-            "Expenses:Bills:Electricity",
-            "Expenses:Bills:Cellular",
-            "Expenses:Bills:Water & Sewer",
-            "Expenses:Bills:Other Loan Payment",
-            "Expenses:Bills:Membership Fees",
-            "Expenses:Bills:Common Fund",
-            "Expenses:Bills:Online-Internet Service",
-            "Expenses:Bills:Natural Gas-Oil",
-            "Expenses:Bills:Homeowner's Dues",
-            "Expenses:Bills:Commute",
-            "Expenses:Bills:Garbage & Recycle",
-            "Expenses:Bills:Home Security",
-            "Expenses:Bills:Yard Maintenance",
-            "Expenses:Bills:Streaming Services",
-            "Expenses:Charitable Donations",
-            "Expenses:Charitable Donations:Political Donations",
-            "Expenses:Childcare",
-            "Expenses:Cash Withdrawal",
-            "Expenses:Cash Withdrawal:Miscellaneous Expenses",
-            "Expenses:Cash Withdrawal:Cash Expeditures",
-            "Expenses:Clothing",
-            "Expenses:Clothing:Casual",
-            "Expenses:Clothing:Formal",
-            "Expenses:Clothing:Makeup",
-            "Expenses:Clothing:Jewellery",
-            "Expenses:Dining Out",
-            "Expenses:Education",
-            "Expenses:Education:Miscellaneous",
-            "Expenses:Education:Fees",
-            "Expenses:Education:Books",
-            "Expenses:Education:Tuition",
-            "Expenses:Education:Kids Classes",
-            "Expenses:Electronics",
-            "Expenses:Electronics:Gadgets",
-            "Expenses:Electronics:Games",
-            "Expenses:Electronics:Accesories",
-            "Expenses:Electronics:Computers",
-            "Expenses:Gifts",
-            "Expenses:Gifts:General",
-            "Expenses:Gifts:To India",
-            "Expenses:Groceries",
-            "Expenses:Groceries:Membership",
-            "Expenses:Healthcare",
-            "Expenses:Healthcare:Counter",
-            "Expenses:Healthcare:Hospital",
-            "Expenses:Healthcare:Physician",
-            "Expenses:Healthcare:Athletic Club",
-            "Expenses:Healthcare:Prescriptions",
-            "Expenses:Healthcare:Home Gym",
-            "Expenses:Healthcare:Eyecare (Before-Tax)",
-            "Expenses:Healthcare:Dental",
-            "Expenses:Healthcare:Eyecare",
-            "Expenses:Healthcare:Miscellaneous",
-            "Expenses:Household",
-            "Expenses:Household:Baby Stuff",
-            "Expenses:Household:Software",
-            "Expenses:Household:Merchandise (Chicago)",
-            "Expenses:Household:Merchandise",
-            "Expenses:Household:House Cleaning",
-            "Expenses:Insurance",
-            "Expenses:Insurance:Life",
-            "Expenses:Insurance:Umbrella",
-            "Expenses:Insurance:Health (Before-Tax)",
-            "Expenses:Insurance:Homeowner's-Renter's",
-            "Expenses:Insurance:Health",
-            "Expenses:Insurance:Automobile",
-            "Expenses:Insurance:Renters",
-            "Expenses:Insurance:Legal",
-            "Expenses:Job Expense",
-            "Expenses:Job Expense:Non-Reimbursed",
-            "Expenses:Job Expense:Reimbursed",
-            "Expenses:Leisure",
-            "Expenses:Leisure:Musical Instruments",
-            "Expenses:Leisure:Toys & Games",
-            "Expenses:Leisure:Sporting Events",
-            "Expenses:Leisure:Entertaining",
-            "Expenses:Leisure:Tapes & CDs",
-            "Expenses:Leisure:Books & Magazines",
-            "Expenses:Leisure:Cultural Events",
-            "Expenses:Leisure:Movies & Video Rentals",
-            "Expenses:Leisure:Music Subscriptions",
-            "Expenses:Leisure:Sporting Goods",
-            "Expenses:Leisure:Phone Apps",
-            "Expenses:Leisure:Music and Dance Classes",
-            "Expenses:Leisure:Concerts",
-            "Expenses:Leisure:Family Events-Parties",
-            "Expenses:Leisure:Activities",
-            "Expenses:Miscellaneous",
-            "Expenses:Miscellaneous:Adjustment",
-            "Expenses:Miscellaneous:Guest Expenses",
-            "Expenses:Miscellaneous:Unclaimed",
-            "Expenses:Miscellaneous:Depreciation",
-            "Expenses:Miscellaneous:Fines",
-            "Expenses:Miscellaneous:Unknown",
-            "Expenses:Miscellaneous:Stationery",
-            "Expenses:Miscellaneous:Tax Preparation",
-            "Expenses:Miscellaneous:Finance Software",
-            "Expenses:Miscellaneous:Family Events",
-            "Expenses:Miscellaneous:Home-Transaction-Charges",
-            "Expenses:Personal Care",
-            "Expenses:Tax",
-            "Expenses:Tax:Fed",
-            "Expenses:Tax:Medicare",
-            "Expenses:Tax:Property",
-            "Expenses:Tax:SDI",
-            "Expenses:Tax:State",
-            "Expenses:Tax:Soc Sec",
-            "Expenses:Tax:Fed-Previous Year",
-            "Expenses:Tax:State-Previous Year",
-            "Expenses:Taxes",
-            "Expenses:Taxes:State-Provincial",
-            "Expenses:Taxes:Medicare Tax",
-            "Expenses:Taxes:Other Taxes",
-            "Expenses:Taxes:Federal Income Tax",
-            "Expenses:Taxes:Sales Tax",
-            "Expenses:Taxes:Income Tax-Previous Year",
-            "Expenses:Taxes:Social Security Tax",
-            "Expenses:Taxes:State Income Tax",
-            "Expenses:Taxes:Local Income Tax",
-            "Expenses:Transportation",
-            "Expenses:Transportation:Rideshare",
-            "Expenses:Transportation:Airfare",
-            "Expenses:Vacation",
-            "Expenses:Vacation:Travel",
-            "Expenses:Vacation:Purchases",
-            "Expenses:Vacation:Lodging",
-            "Expenses:Vacation:Activities",
-            "Expenses:Vacation:Dining",
-            "Expenses:Loan Payment",
-            "Expenses:Loan Payment:Interest",
-            "Expenses:Official",
-            "Expenses:Official:Immigration",
-            "Expenses:Official:Tax Preparation",
-            "Expenses:Depreciation",
-            "Expenses:Home Related",
-            "Expenses:Home Related:Fees-Commisions",
-            "Expenses:Home Related:Furnishings",
-            "Expenses:Home Related:Moving Expenses",
-            "Expenses:Home Related:Maintenance",
-            "Expenses:Home Related:Remodel-Upgrades"
-        ]
+        self.common_categories = _COMMON_CATEGORIES
+        # For O(1) membership checks on every answer
+        self._categories_set = frozenset(self.common_categories) | {"Unspecified"}
+        # Listed categories by lower-cased parent path, for correcting
+        # near-miss answers: {parent: {lower-cased leaf name: category}}
+        self._categories_by_parent: Dict[str, Dict[str, str]] = {}
+        for category in self.common_categories:
+            parent, _, leaf = category.lower().rpartition(":")
+            self._categories_by_parent.setdefault(parent, {})[leaf] = category
+        # Off-list answers already looked up: {answer: listed category or answer}
+        self._category_corrections: Dict[str, str] = {}
+        
+        # Schema-constrained variants of the LLM; include_raw keeps the text
+        # around for the rare answer that still fails validation
+        self._structured_llm = self.llm.with_structured_output(Categorization, include_raw=True)
+        self._structured_group_llm = self.llm.with_structured_output(GroupCategorizations,
+                                                                     include_raw=True)
+        self._structured_escalation_llm = None
+        if self.escalation_llm is not None:
+            self._structured_escalation_llm = self.escalation_llm.with_structured_output(
+                Categorization, include_raw=True)
+        
+        # Static prompt prefix, built once
+        self._system_message = SystemMessage(content=self._build_system_prompt())
+        
+        # Confident results and search summaries by normalized description,
+        # reused for repeats
+        self._result_cache: Dict[str, Dict] = {}
+        self._search_cache: Dict[str, str] = {}
+        
+        # Optional on-disk copy of the result cache (None = this run only)
+        self._cache_db = None
+        self._cache_lock = threading.Lock()
+        self._cache_pending = 0
+        if cache_file is not None:
+            self._open_result_cache(Path(cache_file))
+    
+    def _open_result_cache(self, cache_file: Path) -> None:
+        """Open the on-disk result cache and load unexpired results from this
+        run's models (main and escalation)"""
+        try:
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(cache_file, check_same_thread=False)
+            db.execute("CREATE TABLE IF NOT EXISTS results ("
+                       "key TEXT, model TEXT, version INTEGER, created REAL, record TEXT, "
+                       "PRIMARY KEY (key, model))")
+            db.execute("DELETE FROM results WHERE created < ?", (time.time() - _CACHE_MAX_AGE,))
+            db.commit()
+            rows = db.execute("SELECT key, model, record FROM results WHERE model IN (?, ?) AND version = ? "
+                              "ORDER BY created",
+                              (self.model, self.escalation_model or self.model,
+                               _CACHE_VERSION)).fetchall()
+        except (OSError, sqlite3.Error) as e:
+            print(f"Warning: Could not open result cache: {e}")
+            return
+        
+        corrupt = []
+        for key, model, record in rows:
+            try:
+                result = _json_loads(record)
+                category = result["predicted_category"]
+            except (json.JSONDecodeError, KeyError, TypeError):
+                # Truncated or otherwise unreadable row: drop it, keep the rest
+                corrupt.append((key, model))
+                continue
+            # Categories dropped from the list since the result was stored
+            # are not reused
+            if category in self._categories_set:
+                self._result_cache[key] = result
+        if corrupt:
+            print(f"Warning: Discarding {len(corrupt)} unreadable result cache entries")
+            try:
+                db.executemany("DELETE FROM results WHERE key = ? AND model = ?", corrupt)
+                db.commit()
+            except sqlite3.Error as e:
+                print(f"Warning: Could not write result cache: {e}")
+        self._cache_db = db
     
+    def _store_result(self, key: str, result: Dict) -> None:
+        """Write one cached result through to the on-disk cache"""
+        if self._cache_db is None:
+            return
+        try:
+            with self._cache_lock:
+                self._cache_db.execute(
+                    "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)",
+                    (key, result["model"] or self.model, _CACHE_VERSION, time.time(),
+                     _json_dumps(result)))
+                self._cache_pending += 1
+                if self._cache_pending >= _CACHE_COMMIT_EVERY:
+                    self._cache_db.commit()
+                    self._cache_pending = 0
+        except sqlite3.Error as e:
+            print(f"Warning: Could not write result cache: {e}")
     
-    def _create_agent(self) -> StateGraph:
-        """Create the LangGraph agent for transaction categorization"""
-        
-        def search_transaction_info(transaction_description: str) -> str:
-            """Search for information about a transaction/business"""
-            # Create a smart search query from the transaction description
-            query = f"{transaction_description} company industry type"
-            output = self.search_tool.invoke(query)
-
-            # validate outputs.
-            if not output:
-                return "No search results found."
-            results = output['results']
-            if len(results) == 0:
-                return "No search results found."
-            
-            # Combine search results
-            combined_results = []
-            for result in results[:3]:  # Top 3 results
-                if isinstance(result, dict):
-                    content = result.get('content', '')
-                    if content:
-                        combined_results.append(content[:200])  # Limit length
-        
-            return " | ".join(combined_results) if combined_results else "No relevant information found"
-                    
-        def search_node(state: AgentState) -> AgentState:
-            """Search for transaction information"""
-            description = state["transaction_description"]
-            search_result = search_transaction_info(transaction_description=description)           
-            state["search_results"] = search_result
-            state["messages"].append(ToolMessage(content=search_result, tool_call_id="search"))
-            
-            return state
+    def close(self) -> None:
+        """Commit any pending cache writes, close the on-disk cache and the
+        shared HTTP client"""
+        if self._cache_db is not None:
+            try:
+                with self._cache_lock:
+                    self._cache_db.commit()
+                    self._cache_db.close()
+            except sqlite3.Error as e:
+                print(f"Warning: Could not write result cache: {e}")
+            self._cache_db = None
+        self._http_client.close()
+    
+    
+    def _search_transaction_info(self, transaction_description: str) -> str:
+        """Search for information about a transaction/business"""
+        # Repeats of a merchant (even ones not confident enough for the
+        # result cache) reuse the first search instead of paying for another
+        cache_key = _normalize_description(transaction_description) or transaction_description
+        cached = self._search_cache.get(cache_key)
+        if cached is None:
+            cached = self._search_cache[cache_key] = self._run_search(transaction_description)
+        return cached
+    
+    def _run_search(self, transaction_description: str) -> str:
+        """Query Tavily about a transaction and condense the top results"""
+        # Create a smart search query from the transaction description
+        query = f"{transaction_description} company industry type"
+        output = self.search_tool.invoke(query)
+
+        # validate outputs.
+        if not output:
+            return "No search results found."
+        results = output['results']
+        if len(results) == 0:
+            return "No search results found."
         
-        def categorize_node(state: AgentState) -> AgentState:
-            """Use LLM to categorize the transaction"""
-            
-            # Create categorization prompt
-            prompt = f"""
+        # Combine search results
+        combined_results = []
+        for result in results[:3]:  # Top 3 results
+            if isinstance(result, dict):
+                content = result.get('content', '')
+                if content:
+                    combined_results.append(content[:200])  # Limit length
+    
+        return " | ".join(combined_results) if combined_results else "No relevant information found"
+
+    def _build_system_prompt(self) -> str:
+        """Build the static part of the categorization prompt
+        
+        Everything that does not depend on the transaction (instructions,
+        category list, guidelines) goes in one system message that is
+        byte-identical across calls, so OpenAI's prompt caching can reuse it;
+        only the short per-transaction message follows it.
+        """
+        return f"""
 You are an expert financial transaction categorizer. Your task is to categorize a transaction into the most appropriate expense category.
 
-Transaction Description: {state['transaction_description']}
-Internet Search Results: {state['search_results']}
+The user message gives the transaction description and internet search results about the business.
 
 Common Categories:
 {chr(10).join([f"- {cat}" for cat in self.common_categories])}
@@ -318,40 +598,136 @@ Some categorization guidelines based on GNUCash structure:
 
 You may use the "Unspecified" category to tag transactions that you are unable to classify using the provided categories and rules.
 """
+    
+    def _categorize_messages(self, description: str, search_results: str) -> List:
+        """Messages for one categorization call: static system prefix, then the transaction"""
+        return [
+            self._system_message,
+            HumanMessage(content=f"Transaction Description: {description}\n"
+                                 f"Internet Search Results: {search_results}"),
+        ]
+    
+    def _apply_llm_response(self, state: AgentState, content: str,
+                            model: Optional[str] = None) -> bool:
+        """Parse the LLM's JSON answer into the categorization fields of state;
+        returns False (and records the failure in state) if it does not parse"""
+        try:
+            # Parse JSON response
+            result = _parse_llm_json(content)
             
-            # Get LLM response
-            messages = [HumanMessage(content=prompt)]
-            response = self.llm.invoke(messages)
-            
-            try:
-                # Parse JSON response
-                import json
-                result = json.loads(response.content)
-                pdb.set_trace()
-                
-                state["category"] = result.get("category", "Unknown")
-                state["confidence"] = float(result.get("confidence", 0.0))
-                state["reasoning"] = result.get("reasoning", "No reasoning provided")
-                state["explanation"] = f"LLM categorized based on merchant '{state['extracted_merchant']}' and search results"
-                state["extracted_merchant"] = result.get("merchant")
-                
-            except json.JSONDecodeError:
-                # Fallback if JSON parsing fails
-                state["category"] = "Unknown"
-                state["confidence"] = 0.0
-                state["reasoning"] = "Failed to parse LLM response"
-                state["explanation"] = f"LLM response: {response.content}"
-                state["extracted_merchant"] = "Unknown"
+            self._apply_llm_result(state, result, model)
+            return True
             
-            state["messages"].append(AIMessage(content=f"Categorized as: {state['category']} (confidence: {state['confidence']})"))
-            return state
+        except json.JSONDecodeError:
+            # Fallback if JSON parsing fails
+            state["category"] = "Unknown"
+            state["confidence"] = 0.0
+            state["reasoning"] = "Failed to parse LLM response"
+            state["explanation"] = f"LLM response: {content}"
+            state["extracted_merchant"] = "Unknown"
+            state["model"] = model or self.model
+            return False
+    
+    def _categorize_with_llm(self, state: AgentState, messages: List, structured_llm=None,
+                             model: Optional[str] = None) -> bool:
+        """Ask the LLM (default: the main model) to categorize one transaction
+        and store the answer in state; returns False if the answer did not parse"""
+        output = (structured_llm or self._structured_llm).invoke(messages)
+        if output["parsed"] is not None:
+            self._apply_llm_result(state, output["parsed"].model_dump(), model)
+            return True
+        return self._apply_llm_response(state, output["raw"].content, model)
+    
+    def _escalate(self, state: AgentState, messages: List) -> None:
+        """Re-ask the escalation model when the answer in state is not confident
+        enough, keeping its answer only if it parsed and is more confident"""
+        if (self._structured_escalation_llm is None
+                or state["confidence"] >= self.escalation_threshold):
+            return
+        escalated = dict(state)
+        if (self._categorize_with_llm(escalated, messages, self._structured_escalation_llm,
+                                      self.escalation_model)
+                and escalated["confidence"] > state["confidence"]):
+            state.update(escalated)
+    
+    def _snap_category(self, category) -> str:
+        """Listed category closest to an off-list answer, or the answer unchanged
+        ("Unknown" for a missing, null or non-text answer)"""
+        if not isinstance(category, str) or not category.strip():
+            return "Unknown"
+        if category in self._categories_set:
+            return category
+        corrected = self._category_corrections.get(category)
+        if corrected is None:
+            # Only siblings are candidates, so a shared parent path cannot
+            # make unrelated leaves look alike
+            parent, _, leaf = " ".join(category.split()).lower().rpartition(":")
+            siblings = self._categories_by_parent.get(parent, {})
+            matches = get_close_matches(leaf, siblings, n=1, cutoff=_CATEGORY_SNAP_CUTOFF)
+            corrected = siblings[matches[0]] if matches else category
+            self._category_corrections[category] = corrected
+        return corrected
+    
+    def _apply_llm_result(self, state: AgentState, result: Dict,
+                          model: Optional[str] = None) -> None:
+        """Copy one parsed categorization answer (from model, default: the
+        main model) into state"""
+        state["category"] = self._snap_category(result.get("category"))
+        state["confidence"] = float(result.get("confidence", 0.0))
+        state["reasoning"] = result.get("reasoning", "No reasoning provided")
+        state["explanation"] = f"LLM categorized based on merchant '{state['extracted_merchant']}' and search results"
+        state["extracted_merchant"] = result.get("merchant")
+        state["model"] = model or self.model
+    
+    def _search_node(self, state: AgentState) -> AgentState:
+        """Search for transaction information"""
+        description = state["transaction_description"]
+        search_result = self._search_transaction_info(transaction_description=description)           
+        state["search_results"] = search_result
+        state["messages"].append(ToolMessage(content=search_result, tool_call_id="search"))
+        
+        return state
+    
+    def _categorize_node(self, state: AgentState) -> AgentState:
+        """Use LLM to categorize the transaction"""
+        messages = self._categorize_messages(state['transaction_description'],
+                                             state['search_results'])
+        
+        # Get LLM response
+        self._categorize_with_llm(state, messages)
+        self._escalate(state, messages)
+        
+        state["messages"].append(AIMessage(content=f"Categorized as: {state['category']} (confidence: {state['confidence']})"))
+        return state
+    
+    def _run_pipeline(self, state: AgentState) -> AgentState:
+        """Run the agent's nodes in order as plain calls
+        
+        Same flow as the compiled graph (search -> categorize), without the
+        graph runtime's per-invocation state copies and edge dispatch.
+        """
+        state = self._search_node(state)
+        return self._categorize_node(state)
+    
+    @cached_property
+    def agent(self):
+        """Compiled LangGraph agent running the same nodes as _run_pipeline()"""
+        return self._create_agent()
+    
+    def _create_agent(self) -> StateGraph:
+        """Create the LangGraph agent for transaction categorization
+        
+        categorize_transaction() runs the same nodes through _run_pipeline();
+        the graph is only built when the agent property is first used, for
+        inspection and LangGraph tooling.
+        """
         
         # Create the graph
         workflow = StateGraph(AgentState)
         
         # Add nodes
-        workflow.add_node("search", search_node)
-        workflow.add_node("categorize", categorize_node)
+        workflow.add_node("search", self._search_node)
+        workflow.add_node("categorize", self._categorize_node)
         
         # Add edges
         workflow.set_entry_point("search")
@@ -360,14 +736,115 @@ You may use the "Unspecified" category to tag transactions that you are unable t
         
         return workflow.compile()
     
+    def _match_card_payment(self, description: str) -> Optional[Dict]:
+        """"Unspecified" result for a credit card bill payment, or None"""
+        if not _RE_CARD_PAYMENT.search(description):
+            return None
+        state = self._initial_state(description)
+        state["category"] = "Unspecified"
+        state["confidence"] = 1.0
+        state["reasoning"] = "Credit card bill payment (no search or LLM call)"
+        return self._result_record(description, state)
+    
+    def _match_keyword(self, description: str) -> Optional[Dict]:
+        """Result for a description starting with a known merchant, or None"""
+        match = _KEYWORD_RE.match(description)
+        if match is None:
+            return None
+        keyword = " ".join(match.group(0).upper().replace("*", " ").split())
+        merchant, category = _KEYWORD_CATEGORIES[keyword]
+        state = self._initial_state(description)
+        state["extracted_merchant"] = merchant
+        state["category"] = category
+        state["confidence"] = _KEYWORD_CONFIDENCE
+        state["reasoning"] = f"Matched known merchant keyword '{keyword}' (no search or LLM call)"
+        return self._result_record(description, state)
+    
+    def _cached_result(self, description: str) -> Optional[Dict]:
+        """Earlier result for a description that normalizes the same way, or None"""
+        cached = self._result_cache.get(_normalize_description(description))
+        if cached is None:
+            return None
+        return {**cached,
+                "transaction_description": description,
+                "timestamp": datetime.now().isoformat()}
+    
+    def _remember(self, result: Dict) -> Dict:
+        """Cache a confident LLM result under its normalized description
+        
+        Answers proposing a category outside the list are returned but not
+        reused, so one suggestion is not copied onto every repeat unseen.
+        """
+        if (result["confidence"] >= _CACHE_MIN_CONFIDENCE
+                and result["predicted_category"] in self._categories_set):
+            key = _normalize_description(result["transaction_description"])
+            if key:
+                self._result_cache[key] = dict(result)
+                self._store_result(key, result)
+        return result
+    
+    def _local_result(self, description: str) -> Optional[Dict]:
+        """Result that needs no search or LLM call (card payment, known merchant
+        or cached), or None"""
+        local = self._match_card_payment(description)
+        if local is None:
+            local = self._match_keyword(description)
+        if local is None:
+            local = self._cached_result(description)
+        return local
+    
+    def _once_per_merchant(self, descriptions: List[str], categorize) -> List[Dict]:
+        """Run categorize once per distinct normalized description and copy
+        each result to the repeats, keeping input order"""
+        keys = [_normalize_description(d) or d for d in descriptions]
+        first_index = {}
+        for i, key in enumerate(keys):
+            first_index.setdefault(key, i)
+        unique_results = dict(zip(first_index,
+                                  categorize([descriptions[i] for i in first_index.values()])))
+        
+        results = []
+        for i, (description, key) in enumerate(zip(descriptions, keys)):
+            result = unique_results[key]
+            if first_index[key] != i:
+                result = {**result,
+                          "transaction_description": description,
+                          "timestamp": datetime.now().isoformat()}
+            results.append(result)
+        return results
+    
+    def _with_local_results(self, descriptions: List[str], categorize) -> List[Dict]:
+        """Answer what can be answered locally and pass the rest to categorize, keeping input order"""
+        local = [self._local_result(d) for d in descriptions]
+        pending = [d for d, r in zip(descriptions, local) if r is None]
+        remote = iter(categorize(pending) if pending else ())
+        return [r if r is not None else next(remote) for r in local]
+    
     def categorize_transaction(self, description: str, verbose: bool = False) -> Dict:
         """Categorize a single transaction"""
         
         if verbose:
             print(f"🔍 Categorizing: {description}")
         
-        # Initialize state
-        initial_state: AgentState = {
+        local = self._local_result(description)
+        if local is not None:
+            if verbose:
+                print(f"🎯 Result: {local['predicted_category']} (known merchant or cached, no LLM call)")
+            return local
+        
+        # Run the agent's nodes directly rather than through the graph runtime
+        result = self._run_pipeline(self._initial_state(description))
+        
+        if verbose:
+            print(f"🎯 Result: {result['category']} (confidence: {result['confidence']:.1%})")
+            print(f"💭 Reasoning: {result['reasoning']}")
+        
+        return self._remember(self._result_record(description, result))
+    
+    @staticmethod
+    def _initial_state(description: str) -> AgentState:
+        """Fresh agent state for one transaction"""
+        return {
             "transaction_description": description,
             "extracted_merchant": "",
             "search_results": "",
@@ -375,36 +852,229 @@ You may use the "Unspecified" category to tag transactions that you are unable t
             "category": "",
             "confidence": 0.0,
             "explanation": "",
+            "model": None,
             "messages": []
         }
-        
-        # Run the agent
-        result = self.agent.invoke(initial_state)
-        
-        if verbose:
-            print(f"🎯 Result: {result['category']} (confidence: {result['confidence']:.1%})")
-            print(f"💭 Reasoning: {result['reasoning']}")
-        
+    
+    @staticmethod
+    def _result_record(description: str, state: AgentState) -> Dict:
+        """Result dict reported for one categorized transaction"""
         return {
             "transaction_description": description,
-            "extracted_merchant": result["extracted_merchant"],
-            "predicted_category": result["category"],
-            "confidence": result["confidence"],
-            "reasoning": result["reasoning"],
-            "search_results": result["search_results"],
+            "extracted_merchant": state["extracted_merchant"],
+            "predicted_category": state["category"],
+            "confidence": state["confidence"],
+            "reasoning": state["reasoning"],
+            "search_results": state["search_results"],
+            "model": state["model"],
             "timestamp": datetime.now().isoformat()
         }
     
-    def categorize_batch(self, descriptions: List[str], verbose: bool = False) -> List[Dict]:
-        """Categorize multiple transactions"""
+    def _categorize_group(self, descriptions: List[str]) -> List[Dict]:
+        """Categorize several transactions with a single LLM request
+        
+        Each transaction is still searched on its own, but the answers come
+        back from one call, so the system prompt and request overhead are
+        paid once per group. Transactions missing from the grouped answer,
+        or whose answer cannot be matched to them, are asked about
+        individually.
+        """
+        search_results = [self._search_transaction_info(d) for d in descriptions]
+        entries = "\n\n".join(
+            f"[{i}] Transaction Description: {description}\n"
+            f"Internet Search Results: {search_result}"
+            for i, (description, search_result) in enumerate(zip(descriptions, search_results)))
+        messages = [
+            self._system_message,
+            HumanMessage(content=f"Categorize each of the following {len(descriptions)} transactions independently.\n"
+                                 f"Respond with a raw JSON object of the form {{\"results\": [...]}} holding one object "
+                                 f"per transaction, in the format above plus an \"id\" field with the transaction's "
+                                 f"number.\n\n{entries}"),
+        ]
+        output = self._structured_group_llm.invoke(messages)
+        
+        # If the grouped answer fails validation, everything falls back to
+        # individual requests below. So does an answer whose ids are not
+        # distinct numbers in range (numbered from 1, repeated), since then
+        # no answer can be trusted to belong to its transaction. Answers
+        # are also checked against the description the model echoes back,
+        # which catches reordered ids.
+        answers = {}
+        if output["parsed"] is not None:
+            items = output["parsed"].results
+            ids = [item.id for item in items]
+            if len(set(ids)) == len(ids) and all(0 <= i < len(descriptions) for i in ids):
+                for item in items:
+                    if (_normalize_description(item.description)
+                            == _normalize_description(descriptions[item.id])):
+                        answers[item.id] = item.model_dump()
+        
         results = []
+        for i, (description, search_result) in enumerate(zip(descriptions, search_results)):
+            state = self._initial_state(description)
+            state["search_results"] = search_result
+            item = answers.get(i)
+            messages = self._categorize_messages(description, search_result)
+            if item is None:
+                self._categorize_with_llm(state, messages)
+            else:
+                self._apply_llm_result(state, item)
+            self._escalate(state, messages)
+            results.append(self._remember(self._result_record(description, state)))
         
-        for i, description in enumerate(descriptions):
-            if verbose:
-                print(f"\n--- Transaction {i+1}/{len(descriptions)} ---")
+        return results
+    
+    def _categorize_groups(self, descriptions: List[str], verbose: bool,
+                           concurrency: int, group_size: int) -> List[Dict]:
+        """Categorize descriptions group_size at a time (see _categorize_group)"""
+        groups = [descriptions[i:i + group_size]
+                  for i in range(0, len(descriptions), group_size)]
+        if concurrency > 1:
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                grouped = list(executor.map(self._categorize_group, groups))
+        else:
+            grouped = []
+            for i, group in enumerate(groups):
+                if verbose:
+                    print(f"\n--- Group {i+1}/{len(groups)} ({len(group)} transactions) ---")
+                grouped.append(self._categorize_group(group))
+        return [result for group_results in grouped for result in group_results]
+    
+    def categorize_batch(self, descriptions: List[str], verbose: bool = False,
+                         concurrency: int = 1, group_size: int = 1) -> List[Dict]:
+        """Categorize multiple transactions
+        
+        Each transaction spends nearly all of its time waiting on the search
+        and LLM APIs, so with concurrency > 1 up to that many transactions
+        (or groups) are in flight at once on a thread pool. With
+        group_size > 1, that many transactions share each LLM request.
+        Results keep input order.
+        
+        Descriptions that normalize the same way (same merchant, different
+        store or reference numbers) are categorized once and share the result.
+        """
+        return self._once_per_merchant(
+            descriptions,
+            lambda unique: self._categorize_distinct(unique, verbose, concurrency, group_size))
+    
+    def _categorize_distinct(self, descriptions: List[str], verbose: bool,
+                             concurrency: int, group_size: int) -> List[Dict]:
+        """categorize_batch for descriptions that are already de-duplicated"""
+        if group_size > 1:
+            # Known merchants and cached repeats are settled before grouping
+            # so they do not take up slots in the LLM requests
+            return self._with_local_results(
+                descriptions,
+                lambda pending: self._categorize_groups(pending, verbose, concurrency, group_size))
+        
+        if concurrency <= 1 or len(descriptions) <= 1:
+            results = []
             
-            result = self.categorize_transaction(description, verbose)
-            results.append(result)
+            for i, description in enumerate(descriptions):
+                if verbose:
+                    print(f"\n--- Transaction {i+1}/{len(descriptions)} ---")
+                
+                result = self.categorize_transaction(description, verbose)
+                results.append(result)
+            
+            return results
+        
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            return list(executor.map(
+                lambda description: self.categorize_transaction(description, verbose),
+                descriptions))
+    
+    def categorize_batch_offline(self, descriptions: List[str], verbose: bool = False,
+                                 concurrency: int = 1, poll_interval: float = 30.0,
+                                 timeout: float = 24 * 3600) -> List[Dict]:
+        """Categorize multiple transactions through the OpenAI Batch API
+        
+        Searches still run locally (with up to concurrency at once); the
+        categorization prompts are then submitted as one batch job, which is
+        billed at a discount and does not count against the per-request rate
+        limits. Transactions the batch does not answer (failed requests, or
+        the job not finishing within timeout seconds, after which it is
+        cancelled) are categorized with regular calls instead.
+        """
+        return self._once_per_merchant(
+            descriptions,
+            lambda unique: self._with_local_results(
+                unique,
+                lambda pending: self._categorize_offline(pending, verbose, concurrency,
+                                                         poll_interval, timeout)))
+    
+    def _categorize_offline(self, descriptions: List[str], verbose: bool, concurrency: int,
+                            poll_interval: float, timeout: float) -> List[Dict]:
+        """Batch API submission behind categorize_batch_offline"""
+        from openai import OpenAI
+        
+        client = OpenAI(api_key=self.openai_api_key, http_client=self._http_client)
+        
+        if concurrency > 1:
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                search_results = list(executor.map(self._search_transaction_info, descriptions))
+        else:
+            search_results = [self._search_transaction_info(d) for d in descriptions]
+        batch_messages = [self._categorize_messages(d, r)
+                          for d, r in zip(descriptions, search_results)]
+        
+        # One chat completion request per transaction, matched back up by index
+        requests = "".join(
+            _json_dumps({
+                "custom_id": str(i),
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    "model": self.llm.model_name,
+                    "temperature": self.llm.temperature,
+                    "messages": [{"role": "system", "content": messages[0].content},
+                                 {"role": "user", "content": messages[1].content}],
+                    "response_format": {
+                        "type": "json_schema",
+                        "json_schema": {"name": "Categorization",
+                                        "schema": Categorization.model_json_schema()},
+                    },
+                },
+            }) + "\n"
+            for i, messages in enumerate(batch_messages))
+        batch_input = client.files.create(file=("categorize.jsonl", requests.encode("utf-8")),
+                                          purpose="batch")
+        batch = client.batches.create(input_file_id=batch_input.id,
+                                      endpoint="/v1/chat/completions",
+                                      completion_window="24h")
+        print(f"Submitted batch {batch.id} with {len(batch_messages)} requests")
+        
+        deadline = time.monotonic() + timeout
+        while batch.status not in ("completed", "failed", "expired", "cancelled"):
+            if time.monotonic() >= deadline:
+                print(f"Batch {batch.id} not finished after {timeout:.0f}s; cancelling")
+                client.batches.cancel(batch.id)
+                break
+            time.sleep(poll_interval)
+            batch = client.batches.retrieve(batch.id)
+            if verbose:
+                print(f"Batch {batch.id}: {batch.status}")
+        
+        answers = {}
+        if batch.output_file_id:
+            for line in client.files.content(batch.output_file_id).text.splitlines():
+                record = _json_loads(line)
+                response = record.get("response") or {}
+                if response.get("status_code") == 200:
+                    answers[record["custom_id"]] = response["body"]["choices"][0]["message"]["content"]
+        
+        results = []
+        for i, (description, search_result, messages) in enumerate(zip(descriptions, search_results, batch_messages)):
+            state = self._initial_state(description)
+            state["search_results"] = search_result
+            content = answers.get(str(i))
+            if content is None:
+                # Not answered by the batch: ask directly, reusing the search
+                self._categorize_with_llm(state, messages)
+            else:
+                self._apply_llm_response(state, content)
+            self._escalate(state, messages)
+            results.append(self._remember(self._result_record(description, state)))
         
         return results
 
@@ -468,11 +1138,34 @@ Environment Variables Required:
     parser.add_argument('--file', '-f', help='File containing transaction descriptions (one per line)')
     parser.add_argument('--output', '-o', help='Output file for results (JSON format)')
     parser.add_argument('--verbose', '-v', action='store_true', help='Show detailed reasoning')
+    parser.add_argument('--concurrency', '-j', type=int, default=1,
+                        help='Transactions to categorize in parallel with --file (default: 1)')
+    parser.add_argument('--group-size', '-g', type=int, default=1,
+                        help='With --file, categorize this many transactions per LLM request (default: 1)')
+    parser.add_argument('--model', default='gpt-4o-mini',
+                        help='OpenAI model used to categorize (default: gpt-4o-mini)')
+    parser.add_argument('--escalation-model',
+                        help='Stronger model to re-ask when confidence is below --escalation-threshold '
+                             '(e.g. gpt-4o; default: no escalation)')
+    parser.add_argument('--escalation-threshold', type=float, default=0.6,
+                        help='Confidence below which answers are escalated (default: 0.6)')
+    parser.add_argument('--batch-api', action='store_true',
+                        help='With --file, submit the LLM calls as one OpenAI Batch API job '
+                             '(cheaper, but may take a while to complete)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Do not reuse or store results from earlier runs')
     
     args = parser.parse_args()
     
     if not args.description and not args.file:
         parser.error("Must provide either a transaction description or a file with --file")
+    if args.batch_api and (args.description or not args.file):
+        parser.error("--batch-api only applies to --file (not a single description)")
+    if args.batch_api and args.group_size > 1:
+        parser.error("--group-size cannot be combined with --batch-api")
+    
+    # LangSmith tracing stays off unless explicitly enabled in the environment
+    os.environ.setdefault("LANGCHAIN_TRACING_V2", "false")
     
     # Check environment variables
     if not os.getenv("OPENAI_API_KEY"):
@@ -486,48 +1179,59 @@ Environment Variables Required:
     
     # Initialize categorizer
     try:
-        categorizer = LLMTransactionCategorizer()
+        categorizer = LLMTransactionCategorizer(model=args.model,
+                                                escalation_model=args.escalation_model,
+                                                escalation_threshold=args.escalation_threshold,
+                                                cache_file=None if args.no_cache
+                                                else CACHE_DIR / 'llm_results.sqlite3')
     except ValueError as e:
         print(f"Error: {e}")
         sys.exit(1)
     
-    # Process transactions
-    if args.description:
-        # Single transaction
-        result = categorizer.categorize_transaction(args.description, args.verbose)
-        
-        if not args.verbose:
-            display_results([result])
+    try:
+        # Process transactions
+        if args.description:
+            # Single transaction
+            result = categorizer.categorize_transaction(args.description, args.verbose)
+            
+            if not args.verbose:
+                display_results([result])
+            
+            if args.output:
+                _write_json(args.output, result)
+                print(f"Results saved to {args.output}")
         
-        if args.output:
-            with open(args.output, 'w') as f:
-                json.dump(result, f, indent=2)
-            print(f"Results saved to {args.output}")
+        elif args.file:
+            # Multiple transactions from file
+            if not Path(args.file).exists():
+                print(f"Error: File not found: {args.file}")
+                sys.exit(1)
+            
+            with open(args.file, 'r') as f:
+                descriptions = [line.strip() for line in f if line.strip()]
+            
+            if not descriptions:
+                print("Error: No transaction descriptions found in file")
+                sys.exit(1)
+            
+            print(f"Processing {len(descriptions)} transactions...")
+            if args.batch_api:
+                results = categorizer.categorize_batch_offline(descriptions, args.verbose, args.concurrency)
+            else:
+                results = categorizer.categorize_batch(descriptions, args.verbose, args.concurrency,
+                                                       args.group_size)
+            
+            # Show summary table
+            if not args.verbose:
+                display_results(results)
+            
+            if args.output:
+                _write_json(args.output, results)
+                print(f"Results saved to {args.output}")
     
-    elif args.file:
-        # Multiple transactions from file
-        if not Path(args.file).exists():
-            print(f"Error: File not found: {args.file}")
-            sys.exit(1)
-        
-        with open(args.file, 'r') as f:
-            descriptions = [line.strip() for line in f if line.strip()]
-        
-        if not descriptions:
-            print("Error: No transaction descriptions found in file")
-            sys.exit(1)
-        
-        print(f"Processing {len(descriptions)} transactions...")
-        results = categorizer.categorize_batch(descriptions, args.verbose)
-        
-        # Show summary table
-        if not args.verbose:
-            display_results(results)
-        
-        if args.output:
-            with open(args.output, 'w') as f:
-                json.dump(results, f, indent=2)
-            print(f"Results saved to {args.output}")
+    finally:
+        # Commit results still pending in the on-disk cache
+        categorizer.close()
 
 
 if __name__ == "__main__":
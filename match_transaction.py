@@ -11,6 +11,7 @@ import re
 from pathlib import Path
 from typing import List, Dict, Tuple
 from difflib import SequenceMatcher
+from functools import lru_cache
 
 try:
     from tabulate import tabulate
@@ -20,6 +21,76 @@ except ImportError:
     sys.exit(1)
 
 
+# Common patterns in transaction descriptions, tried in order
+_MERCHANT_PATTERNS = [re.compile(p) for p in (
+    r'PAYPAL \*([^0-9\s]+)',                    # PayPal transactions
+    r'SQ \*([^0-9\s]+)',                        # Square transactions
+    r'TST\* ([^0-9\s]+)',                       # Toast/other POS
+    r'AMZN MKTP ([^0-9\s]+)',                   # Amazon Marketplace
+    r'UBER\s*([^0-9\s]*)',                      # Uber services
+    r'LYFT\s*([^0-9\s]*)',                      # Lyft services
+    r'SPOTIFY\s*([^0-9\s]*)',                   # Spotify
+    r'NETFLIX\s*([^0-9\s]*)',                   # Netflix
+    r'([A-Z][A-Z0-9\s&]+?)(?:\s+\d|\s*$)',      # General merchant pattern
+)]
+
+_RE_DATE = re.compile(r'\d{2}/\d{2}(/\d{2,4})?')
+_RE_HASH = re.compile(r'#\d+')
+_RE_LONGNUM = re.compile(r'\d{4,}')
+_RE_WS = re.compile(r'\s+')
+_RE_NONALNUM = re.compile(r'[^A-Z0-9\s&]')
+_RE_PURE_NUM = re.compile(r'^\d+$')
+
+
+# Every rule re-cleans the same description, so the helpers below are
+# memoized; they are pure functions of the description string.
+@lru_cache(maxsize=None)
+def _clean_description(description: str) -> str:
+    """Clean and normalize transaction descriptions for pattern matching."""
+    cleaned = description.lower()
+    
+    # Remove common transaction artifacts. Same steps, in the same order, as
+    # analyze_transactions.clean_description; passes that cannot match are
+    # skipped with cheap membership tests.
+    if '/' in cleaned:
+        cleaned = _RE_DATE.sub('', cleaned)  # Remove dates
+    if '#' in cleaned:
+        cleaned = _RE_HASH.sub('', cleaned)  # Remove reference numbers
+    cleaned = cleaned.replace('*', '')       # Remove asterisks
+    cleaned = _RE_LONGNUM.sub('', cleaned)   # Remove long numbers (auth codes, etc.)
+    cleaned = ' '.join(cleaned.split())      # Normalize whitespace and strip
+    
+    return cleaned
+
+
+@lru_cache(maxsize=None)
+def _extract_merchant_name(description: str) -> str:
+    """Extract and normalize merchant name from transaction description."""
+    description_clean = description.upper().strip()
+    
+    for pattern in _MERCHANT_PATTERNS:
+        match = pattern.search(description_clean)
+        if match:
+            merchant = match.group(1).strip() if match.group(1) else match.group(0)
+            # Clean up common artifacts
+            merchant = _RE_WS.sub(' ', merchant)
+            merchant = _RE_NONALNUM.sub('', merchant)
+            merchant = merchant.strip()
+            if len(merchant) > 2:
+                return merchant
+    
+    # Fallback: first few words as merchant name
+    words = description_clean.split()
+    merchant_words = []
+    for word in words[:4]:  # Take up to 4 words
+        if len(word) > 2 and not _RE_PURE_NUM.match(word):  # Skip short words and pure numbers
+            merchant_words.append(word)
+        if len(merchant_words) >= 2:  # Stop after getting 2 good words
+            break
+            
+    return ' '.join(merchant_words) if merchant_words else description_clean[:20]
+
+
 class TransactionMatcher:
     """Helper class to test transaction matching against rules."""
     
@@ -48,55 +119,11 @@ class TransactionMatcher:
     
     def clean_description(self, description: str) -> str:
         """Clean and normalize transaction descriptions for pattern matching."""
-        cleaned = description.lower()
-        
-        # Remove common transaction artifacts
-        cleaned = re.sub(r'\d{2}/\d{2}(/\d{2,4})?', '', cleaned)  # Remove dates
-        cleaned = re.sub(r'#\d+', '', cleaned)                    # Remove reference numbers
-        cleaned = re.sub(r'\*+', '', cleaned)                     # Remove asterisks  
-        cleaned = re.sub(r'\d{4,}', '', cleaned)                  # Remove long numbers (auth codes, etc.)
-        cleaned = re.sub(r'\s+', ' ', cleaned)                    # Normalize whitespace
-        cleaned = cleaned.strip()
-        
-        return cleaned
+        return _clean_description(description)
     
     def extract_merchant_name(self, description: str) -> str:
         """Extract and normalize merchant name from transaction description."""
-        patterns = [
-            r'PAYPAL \*([^0-9\s]+)',                    # PayPal transactions
-            r'SQ \*([^0-9\s]+)',                       # Square transactions  
-            r'TST\* ([^0-9\s]+)',                      # Toast/other POS
-            r'AMZN MKTP ([^0-9\s]+)',                  # Amazon Marketplace
-            r'UBER\s*([^0-9\s]*)',                     # Uber services
-            r'LYFT\s*([^0-9\s]*)',                     # Lyft services
-            r'SPOTIFY\s*([^0-9\s]*)',                  # Spotify
-            r'NETFLIX\s*([^0-9\s]*)',                  # Netflix
-            r'([A-Z][A-Z0-9\s&]+?)(?:\s+\d|\s*$)',     # General merchant pattern
-        ]
-        
-        description_clean = description.upper().strip()
-        
-        for pattern in patterns:
-            match = re.search(pattern, description_clean)
-            if match:
-                merchant = match.group(1).strip() if match.group(1) else match.group(0)
-                # Clean up common artifacts
-                merchant = re.sub(r'\s+', ' ', merchant)
-                merchant = re.sub(r'[^A-Z0-9\s&]', '', merchant)
-                merchant = merchant.strip()
-                if len(merchant) > 2:
-                    return merchant
-        
-        # Fallback: first few words as merchant name
-        words = description_clean.split()
-        merchant_words = []
-        for word in words[:4]:  # Take up to 4 words
-            if len(word) > 2 and not re.match(r'^\d+$', word):  # Skip short words and pure numbers
-                merchant_words.append(word)
-            if len(merchant_words) >= 2:  # Stop after getting 2 good words
-                break
-                
-        return ' '.join(merchant_words) if merchant_words else description_clean[:20]
+        return _extract_merchant_name(description)
     
     def similarity_ratio(self, a: str, b: str) -> float:
         """Calculate similarity ratio between two strings."""
@@ -12,6 +12,7 @@ from pathlib import Path
 from collections import defaultdict, Counter
 from typing import List, Dict, Optional, Tuple
 import re
+from functools import lru_cache
 
 from rich.console import Console
 from rich.table import Table
@@ -32,6 +33,99 @@ except ImportError:
     sys.exit(1)
 
 
+# Description normalization (normalize_transaction_description)
+_RE_WS = re.compile(r"\s+")
+_RE_STARS = re.compile(r"\*+")
+_RE_DASHES_DIGITS = re.compile(r"-{2,}\s*(\d+)")
+_RE_DASH_RUN = re.compile(r"\s*-{2,}\s*")
+_RE_SPACED_DASH = re.compile(r"\s-\s")
+_RE_TRAILING_DASH_SPACE = re.compile(r"\s-\s*$")
+_RE_STRAY_HYPHEN = re.compile(r"(?<![A-Z0-9])-(?=[A-Z0-9])|(?<=[A-Z0-9])-(?![A-Z0-9])")
+_RE_DIGITS3 = re.compile(r"\d{3,}")
+_HAS_DIGIT = re.compile(r"\d").search
+_RE_TRAILING_SHORT_NUM = re.compile(r"\s\d{1,2}$")
+
+# Merchant extraction: common patterns in transaction descriptions, tried in order
+_MERCHANT_PATTERNS = [re.compile(p) for p in (
+    r'PAYPAL \*([^0-9\s]+)',                    # PayPal transactions
+    r'SQ \*([^0-9\s]+)',                        # Square transactions
+    r'TST\* ([^0-9\s]+)',                       # Toast/other POS
+    r'AMZN MKTP ([^0-9\s]+)',                   # Amazon Marketplace
+    r'UBER\s*([^0-9\s]*)',                      # Uber services
+    r'LYFT\s*([^0-9\s]*)',                      # Lyft services
+    r'SPOTIFY\s*([^0-9\s]*)',                   # Spotify
+    r'NETFLIX\s*([^0-9\s]*)',                   # Netflix
+    r'([A-Z][A-Z0-9\s&]+?)(?:\s+\d|\s*$)',      # General merchant pattern
+)]
+_RE_NONALNUM = re.compile(r'[^A-Z0-9\s&]')
+_RE_PURE_NUM = re.compile(r'^\d+$')
+
+
+# Memoized like _clean_description below. The result is immutable (the numbers
+# come back as a tuple), so callers can share cached entries safely.
+@lru_cache(maxsize=131072)
+def _normalize_transaction_description(desc: str) -> Tuple[str, Tuple[str, ...]]:
+    """
+    Normalize a transaction description into two fields:
+      - merchant_core: cleaned merchant string (uppercased, no long digit runs, no stray dashes)
+      - numbers: tuple of digit sequences (3+ digits, e.g. phone numbers, IDs)
+    """
+    # Basic cleanup
+    desc = " ".join(desc.upper().split())
+    if "**" in desc:
+        desc = _RE_STARS.sub("*", desc)
+
+    # --- Dash cleanup (order matters) ---
+    # Most descriptions have no dashes at all, and only dash runs need the
+    # first two passes, so cheap membership tests skip the rest.
+    if "-" in desc:
+        if "--" in desc:
+            # 1) Dash runs followed by digits: keep digits, drop dashes
+            desc = _RE_DASHES_DIGITS.sub(r" \1", desc)
+
+            # 2) Remove dash runs not followed by digits
+            desc = _RE_DASH_RUN.sub(" ", desc)
+
+        # 3) Remove standalone/dangling hyphens (tokens ending with or equal to "-")
+        #    (the trailing-dash pass leaves the string ending in a space, so a
+        #    separate end-of-string " -" pass could never match)
+        desc = _RE_SPACED_DASH.sub(" ", desc)           # "WORD - WORD" -> "WORD WORD"
+        desc = _RE_TRAILING_DASH_SPACE.sub(" ", desc)   # trailing " -"
+
+        # 4) Preserve in-word hyphens (WAL-MART, ON-LINE), but strip stray leading/trailing
+        #    "-WORD" and "WORD-" in one pass; the two cases cannot overlap
+        desc = _RE_STRAY_HYPHEN.sub(" ", desc)
+
+    # Extract and remove digit sequences (3+ digits)
+    if _HAS_DIGIT(desc):
+        numbers = tuple(_RE_DIGITS3.findall(desc))
+        merchant_core = _RE_DIGITS3.sub("", desc).strip()
+
+        # Remove dangling 1–2 digit tokens at the end
+        merchant_core = _RE_TRAILING_SHORT_NUM.sub("", merchant_core)
+    else:
+        # No digits: neither digit pass can match
+        numbers = ()
+        merchant_core = desc
+
+    # Final space normalization (split/join also strips)
+    merchant_core = " ".join(merchant_core.split())
+
+    # return lower case descriptions.
+    return merchant_core.lower(), numbers
+
+
+# Descriptions repeat heavily within a statement (and across rules applied
+# to the same transaction), so the fixed-point cleanup is memoized.
+@lru_cache(maxsize=131072)
+def _clean_description(desc: str) -> str:
+    prev = None
+    while desc != prev:
+        prev = desc
+        desc, _ = _normalize_transaction_description(desc)
+    return desc
+
+
 class QFXParser:
     """Parses QFX files and categorizes transactions using existing rules."""
     
@@ -43,6 +137,7 @@ class QFXParser:
         self.categorized_transactions = []
         self.uncategorized_transactions = []
         self.low_confidence_transactions = []
+        self._merchant_cache = {}  # {description: extracted merchant name}
         
     def load_rules(self) -> bool:
         """Load categorization rules from JSON file."""
@@ -119,49 +214,9 @@ class QFXParser:
             print(f"Error parsing QFX file: {e}")
             return False
 
-    def normalize_transaction_description(self, desc: str) -> Tuple[str, List[str]]:
-        """
-        Normalize a transaction description into two fields:
-          - merchant_core: cleaned merchant string (uppercased, no long digit runs, no stray dashes)
-          - numbers: list of digit sequences (3+ digits, e.g. phone numbers, IDs)
-        """
-        # Basic cleanup
-        desc = desc.strip().upper()
-        desc = re.sub(r"\s+", " ", desc)
-        desc = re.sub(r"\*+", "*", desc)
-
-        # --- Dash cleanup (order matters) ---
-        # 1) Dash runs followed by digits: keep digits, drop dashes
-        desc = re.sub(r"-{2,}\s*(\d+)", r" \1", desc)
-
-        # 2) Remove dash runs not followed by digits
-        desc = re.sub(r"\s*-{2,}\s*", " ", desc)
-
-        # 3) Remove standalone/dangling hyphens (tokens ending with or equal to "-")
-        desc = re.sub(r"\s-\s", " ", desc)     # "WORD - WORD" -> "WORD WORD"
-        desc = re.sub(r"\s-\s*$", " ", desc)   # trailing " -"
-        desc = re.sub(r"\s-$", "", desc)       # end-of-string " -"
-
-        # 4) Preserve in-word hyphens (WAL-MART, ON-LINE), but strip stray leading/trailing
-        desc = re.sub(r"(?<![A-Z0-9])-(?=[A-Z0-9])", " ", desc)   # leading "-WORD"
-        desc = re.sub(r"(?<=[A-Z0-9])-(?![A-Z0-9])", " ", desc)   # trailing "WORD-"
-
-        # Extract and remove digit sequences (3+ digits) in one pass
-        numbers: List[str] = []
-        def _collect_and_remove(m: re.Match) -> str:
-            numbers.append(m.group(0))
-            return ""
-
-        merchant_core = re.sub(r"\d{3,}", _collect_and_remove, desc).strip()
-
-        # Remove dangling 1–2 digit tokens at the end
-        merchant_core = re.sub(r"\s\d{1,2}$", "", merchant_core)
-
-        # Final space normalization
-        merchant_core = re.sub(r"\s+", " ", merchant_core).strip()
-
-        # return lower case descriptions.
-        return merchant_core.lower(), numbers
+    def normalize_transaction_description(self, desc: str) -> Tuple[str, Tuple[str, ...]]:
+        """Return (merchant_core, numbers); see _normalize_transaction_description."""
+        return _normalize_transaction_description(desc)
 
     def display_transactions(self) -> None:
         """
@@ -184,11 +239,7 @@ class QFXParser:
         console.print(table)
 
     def clean_description(self, desc: str):
-        prev = None
-        while desc != prev:
-            prev = desc
-            desc, _ = self.normalize_transaction_description(desc)
-        return desc
+        return _clean_description(desc)
 
     def normalize_transaction(self, tx: Dict) -> Dict:
         """
@@ -206,27 +257,15 @@ class QFXParser:
 
     def extract_merchant_name(self, description: str) -> str:
         """Extract and normalize merchant name from transaction description."""
-        patterns = [
-            r'PAYPAL \*([^0-9\s]+)',                    # PayPal transactions
-            r'SQ \*([^0-9\s]+)',                       # Square transactions  
-            r'TST\* ([^0-9\s]+)',                      # Toast/other POS
-            r'AMZN MKTP ([^0-9\s]+)',                  # Amazon Marketplace
-            r'UBER\s*([^0-9\s]*)',                     # Uber services
-            r'LYFT\s*([^0-9\s]*)',                     # Lyft services
-            r'SPOTIFY\s*([^0-9\s]*)',                  # Spotify
-            r'NETFLIX\s*([^0-9\s]*)',                  # Netflix
-            r'([A-Z][A-Z0-9\s&]+?)(?:\s+\d|\s*$)',     # General merchant pattern
-        ]
-        
         description_clean = description.upper().strip()
         
-        for pattern in patterns:
-            match = re.search(pattern, description_clean)
+        for pattern in _MERCHANT_PATTERNS:
+            match = pattern.search(description_clean)
             if match:
                 merchant = match.group(1).strip() if match.group(1) else match.group(0)
                 # Clean up common artifacts
-                merchant = re.sub(r'\s+', ' ', merchant)
-                merchant = re.sub(r'[^A-Z0-9\s&]', '', merchant)
+                merchant = _RE_WS.sub(' ', merchant)
+                merchant = _RE_NONALNUM.sub('', merchant)
                 merchant = merchant.strip()
                 if len(merchant) > 2:
                     return merchant
@@ -235,13 +274,24 @@ class QFXParser:
         words = description_clean.split()
         merchant_words = []
         for word in words[:4]:  # Take up to 4 words
-            if len(word) > 2 and not re.match(r'^\d+$', word):  # Skip short words and pure numbers
+            if len(word) > 2 and not _RE_PURE_NUM.match(word):  # Skip short words and pure numbers
                 merchant_words.append(word)
             if len(merchant_words) >= 2:  # Stop after getting 2 good words
                 break
                 
         return ' '.join(merchant_words) if merchant_words else description_clean[:20]
     
+    def _cached_merchant_name(self, description: str) -> str:
+        """
+        extract_merchant_name() with a per-description cache, shared by
+        categorization, the summaries and the rule suggestions.
+        """
+        merchant = self._merchant_cache.get(description)
+        if merchant is None:
+            merchant = self.extract_merchant_name(description)
+            self._merchant_cache[description] = merchant
+        return merchant
+    
     def similarity_ratio(self, a: str, b: str) -> float:
         """Calculate similarity ratio between two strings."""
         from difflib import SequenceMatcher
@@ -278,6 +328,89 @@ class QFXParser:
         
         return False, 0.0
     
+    def _build_rule_index(self) -> Dict:
+        """
+        Index the loaded rules for categorize_transactions.
+
+        Exact-description and merchant-name rules only match on equality, so
+        they are looked up by lowercased pattern; for each pattern only the
+        rule that would win (highest confidence, earliest on ties) is kept.
+        Contains and fuzzy rules still need a scan and are kept as lists,
+        ordered best-first.
+        Every entry carries the rule's position in self.rules for tie-breaking.
+        """
+        exact = {}
+        merchant = {}
+        contains = []
+        fuzzy = []
+        
+        for position, rule in enumerate(self.rules):
+            rule_type = rule['type']
+            pattern = rule['pattern']
+            confidence = rule['confidence']
+            
+            if rule_type in ('merchant_name', 'description_exact'):
+                index = merchant if rule_type == 'merchant_name' else exact
+                key = pattern.lower()
+                if key not in index or confidence > index[key][0]:
+                    index[key] = (confidence, position, rule)
+            elif rule_type == 'description_contains':
+                contains.append((confidence, position, rule, pattern.lower()))
+            elif rule_type == 'fuzzy_merchant':
+                fuzzy.append((confidence, position, rule, rule.get('variants', [pattern])))
+        
+        # Scan order: most confident first, rule order on ties. The first
+        # match in a list is then the best that list can offer.
+        contains.sort(key=lambda entry: (-entry[0], entry[1]))
+        fuzzy.sort(key=lambda entry: (-entry[0], entry[1]))
+        
+        return {'exact': exact, 'merchant': merchant, 'contains': contains, 'fuzzy': fuzzy}
+    
+    def _find_best_rule(self, transaction: Dict, rule_index: Dict) -> Tuple[Optional[Dict], float]:
+        """
+        Return (rule, confidence) for the best matching rule, or (None, 0.0).
+
+        Picks the same rule as trying every rule in order with apply_rule and
+        keeping strict improvements: the highest confidence, earliest rule on
+        ties. The merchant name and cleaned description are computed once.
+        """
+        description = transaction['description']
+        merchant = self._cached_merchant_name(description)
+        cleaned_desc = self.clean_description(description)
+        
+        best = None  # (confidence, position, rule)
+        
+        def better(candidate) -> bool:
+            if candidate[0] <= 0.0:
+                return False
+            return best is None or candidate[0] > best[0] or \
+                (candidate[0] == best[0] and candidate[1] < best[1])
+        
+        for candidate in (rule_index['merchant'].get(merchant.lower()),
+                          rule_index['exact'].get(cleaned_desc)):
+            if candidate is not None and better(candidate):
+                best = candidate
+        
+        # The lists are sorted best-first, so stop at the first rule that
+        # matches or that could no longer beat the current best.
+        for candidate in rule_index['contains']:
+            if not better(candidate):
+                break
+            if candidate[3] in cleaned_desc:
+                best = candidate
+                break
+        
+        for candidate in rule_index['fuzzy']:
+            if not better(candidate):
+                break
+            if any(self.similarity_ratio(merchant, variant) >= 0.8 for variant in candidate[3]):
+                best = candidate
+                break
+        
+        if best is None:
+            return None, 0.0
+        return best[2], best[0]
+    
     def categorize_transactions(self, confidence_threshold: float = 0.3) -> None:
         """Categorize transactions using the loaded rules."""
         if not self.rules:
@@ -292,16 +425,10 @@ class QFXParser:
         print(f"Categorizing {len(self.transactions)} transactions...")
         print(f"Using confidence threshold: {confidence_threshold}")
         
+        rule_index = self._build_rule_index()
+        
         for transaction in self.transactions:
-            best_match = None
-            best_confidence = 0.0
-            
-            # Try each rule
-            for rule in self.rules:
-                matched, confidence = self.apply_rule(transaction, rule)
-                if matched and confidence > best_confidence:
-                    best_match = rule
-                    best_confidence = confidence
+            best_match, best_confidence = self._find_best_rule(transaction, rule_index)
             
             # Categorize based on best match
             if best_match:
@@ -360,7 +487,7 @@ class QFXParser:
         # Merchant analysis for uncategorized transactions
         uncategorized_merchants = Counter()
         for trans in self.uncategorized_transactions:
-            merchant = self.extract_merchant_name(trans['description'])
+            merchant = self._cached_merchant_name(trans['description'])
             if merchant:
                 uncategorized_merchants[merchant] += 1
         
@@ -506,7 +633,7 @@ class QFXParser:
             table_data = []
             
             for trans in self.uncategorized_transactions:
-                merchant = self.extract_merchant_name(trans['description'])
+                merchant = self._cached_merchant_name(trans['description'])
                 if len(merchant) > 25:
                     merchant = merchant[:22] + "..."
                 
@@ -570,7 +697,7 @@ class QFXParser:
         # Group by merchant
         merchant_groups = defaultdict(list)
         for trans in self.uncategorized_transactions:
-            merchant = self.extract_merchant_name(trans['description'])
+            merchant = self._cached_merchant_name(trans['description'])
             if merchant and len(merchant) > 2:
                 merchant_groups[merchant].append(trans)
         